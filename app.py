@@ -1,8 +1,11 @@
 import streamlit as st
 import os
-from langchain_ollama import OllamaLLM
 import database
 import processor
+from model_manager import (
+    ModelManager, DEFAULT_KEEP_ALIVE, DEFAULT_MODEL, preload_models,
+    COLD, LOADING, READY, EVICTED, FAILED
+)
 from typing import Dict, Any
 
 # Page configuration
@@ -19,6 +22,29 @@ AVAILABLE_MODELS = {
     "phi3:latest": "Microsoft Phi-3 (Latest)"
 }
 
+MODEL_STATE_ICONS = {
+    COLD: "⚪",
+    LOADING: "🟡",
+    READY: "🟢",
+    EVICTED: "🟠",
+    FAILED: "🔴"
+}
+
+@st.cache_resource
+def get_model_manager() -> ModelManager:
+    """Shared model manager; preloads the default model and OLLAMA_PRELOAD_MODELS once per process"""
+    OLLAMA_BASE_URL = os.getenv("OLLAMA_BASE_URL", "http://localhost:11434")
+    manager = ModelManager(
+        OLLAMA_BASE_URL, preload_models(DEFAULT_MODEL),
+        keep_alive=os.getenv("OLLAMA_KEEP_ALIVE", DEFAULT_KEEP_ALIVE)
+    )
+    manager.start()
+    return manager
+
+# Streamlit runs the script only when the first session connects; run
+# `python model_manager.py` before starting the app to warm models ahead of that
+get_model_manager()
+
 # Initialize session state
 if 'processor' not in st.session_state:
     st.session_state.processor = None
@@ -27,7 +53,7 @@ if 'graph' not in st.session_state:
 if 'llm' not in st.session_state:
     st.session_state.llm = None
 if 'selected_model' not in st.session_state:
-    st.session_state.selected_model = "llama3.1:latest"
+    st.session_state.selected_model = DEFAULT_MODEL
 
 # Initialize connections
 def initialize_connections(model_name: str):
@@ -40,12 +66,10 @@ def initialize_connections(model_name: str):
         if (st.session_state.llm is None or 
             st.session_state.selected_model != model_name):
             
-            OLLAMA_BASE_URL = os.getenv("OLLAMA_BASE_URL", "http://localhost:11434")
-            st.session_state.llm = OllamaLLM(
-                base_url=OLLAMA_BASE_URL, 
-                model=model_name
-            )
+            st.session_state.llm = get_model_manager().get_llm(model_name)
             st.session_state.selected_model = model_name
+            if st.session_state.processor is not None:
+                st.session_state.processor.llm = st.session_state.llm
             st.toast(f"Switched to {AVAILABLE_MODELS[model_name]} model", icon="🤖")
         
         if st.session_state.processor is None:
@@ -73,12 +97,42 @@ def render_sidebar():
             index=list(AVAILABLE_MODELS.keys()).index(st.session_state.selected_model)
         )
         
-        # Update model if changed
+        # Switch only once the target model is resident; keep the current one meanwhile
+        manager = get_model_manager()
         if selected_model != st.session_state.selected_model:
-            initialize_connections(selected_model)
+            target = manager.status().get(selected_model, {})
+            if target.get('state') == FAILED:
+                # Retry only when asked; re-warming on every rerun would start a load each time
+                st.error(
+                    f"Could not load {AVAILABLE_MODELS[selected_model]}: {target['error']}. "
+                    f"{AVAILABLE_MODELS[st.session_state.selected_model]} stays active."
+                )
+                if st.button("Retry loading"):
+                    manager.warm(selected_model)
+                    st.rerun()
+            elif manager.is_ready(selected_model):
+                initialize_connections(selected_model)
+            else:
+                manager.warm(selected_model)
+                st.info(
+                    f"Loading {AVAILABLE_MODELS[selected_model]} in the background. "
+                    f"{AVAILABLE_MODELS[st.session_state.selected_model]} stays active until it is ready."
+                )
+                st.button("Refresh model status")
         
         st.markdown(f"**Current Model:** {AVAILABLE_MODELS[st.session_state.selected_model]}")
         
+        st.markdown("### Model Status")
+        for model, info in manager.status().items():
+            line = f"{MODEL_STATE_ICONS[info['state']]} {AVAILABLE_MODELS.get(model, model)}: {info['state']}"
+            if info['size']:
+                line += f" ({info['size'] / 1e9:.1f} GB, {info['size_vram'] / info['size']:.0%} GPU)"
+            st.write(line)
+            if info['state'] == EVICTED:
+                st.caption("Unloaded by Ollama to free memory; it will be reloaded when selected.")
+            if info['error']:
+                st.caption(info['error'])
+        
         st.markdown("""
         **How to use:**
         1. Select your preferred AI model
@@ -136,6 +190,14 @@ def render_main_content():
             st.error("Failed to initialize system connections. Please check your setup.")
             return
             
+        # Only reachable while the first preload is in flight or after Ollama evicted the model
+        manager = get_model_manager()
+        if not manager.is_ready(st.session_state.selected_model):
+            with st.spinner(f"Waiting for {AVAILABLE_MODELS[st.session_state.selected_model]} to finish loading..."):
+                if not manager.wait_until_ready(st.session_state.selected_model):
+                    st.error("The selected model could not be loaded. Check that Ollama is running.")
+                    return
+            
         with st.spinner(f"Analyzing with {AVAILABLE_MODELS[st.session_state.selected_model]}..."):
             result = st.session_state.processor.process_query(query)
             
@@ -160,6 +222,8 @@ def render_main_content():
         with col2:
             st.subheader("Complications Found")
             st.info(f"**Number of complications:** {len(result['complications'])}")
+            if result['dropped_rows']:
+                st.info(f"**Sent to model:** top {result['context_rows']} (dropped {result['dropped_rows']} to fit the context budget)")
             st.info(f"**AI Model Used:** {AVAILABLE_MODELS[st.session_state.selected_model]}")
         
         # Display complications in an expandable section
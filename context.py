@@ -0,0 +1,121 @@
+import math
+import os
+import re
+from typing import List, Dict, Any
+
+# Default prompt budget for the complications table (in approximate tokens)
+DEFAULT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", "600"))
+
+# Relative weights of the ranking signals
+FREQUENCY_WEIGHT = 0.5
+ONSET_WEIGHT = 0.3
+LIFT_WEIGHT = 0.2
+
+TABLE_HEADER = "complication|avg_yrs|median_yrs|n|lift"
+
+# Llama-style tokenizers split digits into groups of up to 3 and give each separator its own token
+TOKEN_PATTERN = re.compile(r"\d{1,3}|[A-Za-z]+|\S|\n")
+
+def estimate_tokens(text: str) -> int:
+    """Conservative token count for the pipe- and number-heavy complications table"""
+    count = 0
+    for piece in TOKEN_PATTERN.findall(text):
+        # Long words are split into several sub-word tokens
+        count += (len(piece) + 3) // 4 if piece.isalpha() else 1
+    return count
+
+def calculate_lift(comp: Dict, total_frequency: int) -> float:
+    """Lift of the transition: P(complication | diagnosis) / P(complication)"""
+    frequency = comp.get('frequency') or 0
+    out_frequency = comp.get('out_frequency') or 0
+    in_frequency = comp.get('in_frequency') or 0
+    if not (frequency and out_frequency and in_frequency and total_frequency):
+        return 1.0
+    return (frequency / out_frequency) / (in_frequency / total_frequency)
+
+def onset_relevance(comp: Dict, timeframe: int = None) -> float:
+    """Score in [0, 1] for how well the typical onset matches the requested timeframe"""
+    onset = comp.get('avg_years')
+    if onset is None:
+        onset = comp.get('median_years')
+    if onset is None:
+        return 0.0
+    if not timeframe:
+        # No timeframe requested: favour earlier onsets, slowly
+        return 1.0 / (1.0 + onset / 10.0)
+    if onset <= timeframe:
+        return 1.0
+    return math.exp(-(onset - timeframe) / timeframe)
+
+def rank_complications(complications: List[Dict], timeframe: int = None, total_frequency: int = 0) -> List[Dict]:
+    """Rank complications by frequency, onset relevance and lift (best first)"""
+    if not complications:
+        return []
+
+    max_log_frequency = max(math.log1p(comp.get('frequency') or 0) for comp in complications) or 1.0
+
+    ranked = []
+    for comp in complications:
+        lift = calculate_lift(comp, total_frequency)
+        frequency_score = math.log1p(comp.get('frequency') or 0) / max_log_frequency
+        # Map lift onto [0, 1): 1.0 (independence) -> 0.5
+        lift_score = lift / (1.0 + lift)
+        score = (FREQUENCY_WEIGHT * frequency_score
+                 + ONSET_WEIGHT * onset_relevance(comp, timeframe)
+                 + LIFT_WEIGHT * lift_score)
+        ranked.append({**comp, 'lift': round(lift, 2), 'score': score})
+
+    ranked.sort(key=lambda comp: comp['score'], reverse=True)
+    return ranked
+
+def format_value(value: Any) -> str:
+    """Compact cell encoding: drop trailing zeros and render missing values as '-'"""
+    if value is None:
+        return "-"
+    if isinstance(value, float):
+        return f"{value:.1f}".rstrip("0").rstrip(".")
+    return str(value)
+
+def format_row(comp: Dict) -> str:
+    """Encode one complication as a pipe-separated table row"""
+    return "|".join([
+        comp['complication_name'],
+        format_value(comp.get('avg_years')),
+        format_value(comp.get('median_years')),
+        format_value(comp.get('frequency')),
+        format_value(comp.get('lift'))
+    ])
+
+def build_context(complications: List[Dict], timeframe: int = None, total_frequency: int = 0,
+                  token_budget: int = None) -> Dict[str, Any]:
+    """Pack the highest ranked complications into a fixed token budget"""
+    if token_budget is None:
+        token_budget = DEFAULT_TOKEN_BUDGET
+
+    ranked = rank_complications(complications, timeframe, total_frequency)
+
+    # Reserve room for the header and the omission note so the total never exceeds the budget
+    omitted_note = f"(+{len(ranked)} lower-ranked complications omitted)"
+    used_tokens = estimate_tokens(TABLE_HEADER) + estimate_tokens(omitted_note)
+
+    rows = []
+    for comp in ranked:
+        row = format_row(comp)
+        row_tokens = estimate_tokens(row) + 1  # newline
+        if used_tokens + row_tokens > token_budget:
+            break
+        rows.append(row)
+        used_tokens += row_tokens
+
+    dropped = len(ranked) - len(rows)
+    lines = [TABLE_HEADER] + rows
+    if dropped:
+        lines.append(f"(+{dropped} lower-ranked complications omitted)")
+    table = "\n".join(lines)
+
+    return {
+        "table": table,
+        "included": len(rows),
+        "dropped": dropped,
+        "tokens": estimate_tokens(table)
+    }
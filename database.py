@@ -38,10 +38,17 @@ def get_diagnosis_id(graph: Neo4jGraph, diagnosis_name: str, cache: dict) -> str
 def get_complications_within_timeframe(graph: Neo4jGraph, diagnosis_code: str, years: int = 2) -> List[Dict]:
     """Get complications that typically progress within given years"""
     query = """
-    MATCH (start:Diagnosis {code: $code})-[rel:PROGRESSES_TO]->(complication:Diagnosis)
+    MATCH (start:Diagnosis {code: $code})-[out:PROGRESSES_TO]->()
+    WITH start, sum(out.overall_frequency) as out_frequency
+    MATCH (start)-[rel:PROGRESSES_TO]->(complication:Diagnosis)
     WHERE rel.overall_avg_years <= $years 
        OR rel.overall_median_years <= $years
        OR rel.overall_max_years <= $years
+    CALL {
+        WITH complication
+        MATCH ()-[inc:PROGRESSES_TO]->(complication)
+        RETURN sum(inc.overall_frequency) as in_frequency
+    }
     RETURN 
         complication.code as complication_code,
         complication.name as complication_name,
@@ -49,7 +56,9 @@ def get_complications_within_timeframe(graph: Neo4jGraph, diagnosis_code: str, y
         rel.overall_median_years as median_years,
         rel.overall_min_years as min_years,
         rel.overall_max_years as max_years,
-        rel.overall_frequency as frequency
+        rel.overall_frequency as frequency,
+        out_frequency,
+        in_frequency
     ORDER BY rel.overall_frequency DESC
     """
     
@@ -59,7 +68,14 @@ def get_complications_within_timeframe(graph: Neo4jGraph, diagnosis_code: str, y
 def get_all_possible_complications(graph: Neo4jGraph, diagnosis_code: str) -> List[Dict]:
     """Get all possible complications regardless of timeframe"""
     query = """
-    MATCH (start:Diagnosis {code: $code})-[rel:PROGRESSES_TO]->(complication:Diagnosis)
+    MATCH (start:Diagnosis {code: $code})-[out:PROGRESSES_TO]->()
+    WITH start, sum(out.overall_frequency) as out_frequency
+    MATCH (start)-[rel:PROGRESSES_TO]->(complication:Diagnosis)
+    CALL {
+        WITH complication
+        MATCH ()-[inc:PROGRESSES_TO]->(complication)
+        RETURN sum(inc.overall_frequency) as in_frequency
+    }
     RETURN 
         complication.code as complication_code,
         complication.name as complication_name,
@@ -67,9 +83,23 @@ def get_all_possible_complications(graph: Neo4jGraph, diagnosis_code: str) -> Li
         rel.overall_median_years as median_years,
         rel.overall_min_years as min_years,
         rel.overall_max_years as max_years,
-        rel.overall_frequency as frequency
+        rel.overall_frequency as frequency,
+        out_frequency,
+        in_frequency
     ORDER BY rel.overall_frequency DESC
     """
     
     result = graph.query(query, params={"code": diagnosis_code})
-    return result
\ No newline at end of file
+    return result
+
+def get_total_transition_frequency(graph: Neo4jGraph) -> int:
+    """Get the total number of observed transitions across all PROGRESSES_TO edges"""
+    query = """
+    MATCH ()-[rel:PROGRESSES_TO]->()
+    RETURN sum(rel.overall_frequency) as total
+    """
+    
+    result = graph.query(query)
+    if result and result[0]['total']:
+        return result[0]['total']
+    return 0
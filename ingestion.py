@@ -0,0 +1,482 @@
+"""Single-pass ingestion of processed.csv into the patient graph and the trajectory graph.
+
+The patient file is read and parsed exactly once. Parsed patients are fanned out in
+chunks over bounded queues to the selected stages, each running in its own thread, so
+parsing, aggregation and database writes overlap:
+
+    python ingestion.py --stages patients transitions columnar
+"""
+#imports
+from neo4j import GraphDatabase
+from collections import defaultdict
+import argparse
+import ast
+import csv
+import json
+import os
+import queue
+import statistics
+import threading
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # only needed by the columnar exporter
+    pa = None
+    pq = None
+
+PATIENT_CSV = 'data/processed.csv'
+DISEASE_CSV = 'data/BPS_pathologies_gen3.csv'
+PARQUET_FILE = 'data/processed.parquet'
+
+# End-of-stream marker sent to every stage queue
+SENTINEL = None
+
+def load_disease_names(csv_file):
+    """Load disease code-name mappings"""
+    disease_names = {}
+    with open(csv_file, 'r') as file:
+        reader = csv.DictReader(file)
+        for row in reader:
+            disease_names[row['CODE_BPS']] = row['BPS_PATHOLOGY']
+    return disease_names
+
+def process_age(age_code):
+    """Convert age codes"""
+    return int(str(age_code)[1:])  # Convert "9070" to 70
+
+def calculate_stats(intervals):
+    """Calculate statistics for a list of intervals"""
+    if not intervals:
+        return None
+    return {
+        'min': min(intervals),
+        'max': max(intervals),
+        'avg': sum(intervals) / len(intervals),
+        'median': statistics.median(intervals),
+        'std_dev': statistics.stdev(intervals) if len(intervals) > 1 else 0,
+        'count': len(intervals),
+        'q1': statistics.quantiles(intervals, n=4)[0] if len(intervals) >= 4 else None,
+        'q3': statistics.quantiles(intervals, n=4)[2] if len(intervals) >= 4 else None
+    }
+
+def get_gender_prefix(gender_code):
+    """Convert numeric gender codes to valid Neo4j property names"""
+    gender_mapping = {
+        '1111': 'male',
+        '2222': 'female',
+        'UNKNOWN': 'unknown'
+    }
+    return gender_mapping.get(gender_code, f"gender_{gender_code}")
+
+def create_driver():
+    """Create a Neo4j driver from the same environment variables as database.py"""
+    uri = os.getenv("NEO4J_URI", "bolt://localhost:7687")
+    user = os.getenv("NEO4J_USERNAME", "neo4j")
+    password = os.getenv("NEO4J_PASSWORD", "CAMDA@123121")
+    return GraphDatabase.driver(uri, auth=(user, password))
+
+# Parse stage
+def parse_line(line):
+    """Parse one processed.csv line into a patient record, or None if it is malformed"""
+    # Split the line while preserving the relation structure
+    parts = line.strip().split(',', 2)
+    if len(parts) < 3:
+        return None
+
+    patient_id, sex, visits_str = parts
+    visits_str = visits_str.strip(' "')  # Remove outer quotes if present
+
+    visits = []
+    for visit in ast.literal_eval(visits_str):
+        if not visit or len(visit) < 2:
+            continue
+
+        age_code, *codes = visit
+        try:
+            age = process_age(age_code)
+        except (ValueError, TypeError):
+            print(f"Invalid age code for patient {patient_id}: {age_code}")
+            continue
+        visits.append((age_code, age, codes))
+
+    return {'patient_id': patient_id, 'sex': sex, 'visits': visits}
+
+def read_patients(csv_file, chunk_size):
+    """Stream parsed patient records from processed.csv in chunks"""
+    chunk = []
+    with open(csv_file, 'r') as file:
+        next(file)  # Skip header
+        for line_num, line in enumerate(file, 2):
+            try:
+                record = parse_line(line)
+            except Exception as e:
+                print(f"Error processing line {line_num}: {str(e)}")
+                continue
+            if record is None:
+                print(f"Skipping line {line_num}: Not enough columns")
+                continue
+
+            chunk.append(record)
+            if len(chunk) >= chunk_size:
+                yield chunk
+                chunk = []
+
+            if line_num % 100000 == 0:
+                print(f"Parsed {line_num - 1} patients")
+    if chunk:
+        yield chunk
+
+# Output stages
+class PatientGraphWriter:
+    """Write Patient nodes and HAS_DIAGNOSIS relationships (formerly construction.py)"""
+    name = 'patients'
+
+    def __init__(self, driver, disease_names):
+        self.driver = driver
+        self.disease_names = disease_names
+        self.session = None
+
+    def setup(self):
+        """Create indexes and constraints"""
+        self.session = self.driver.session()
+        # Clear any existing conflicting indexes
+        self.session.run("DROP INDEX patient_id_index IF EXISTS")
+        self.session.run("DROP INDEX diagnosis_code_index IF EXISTS")
+
+        # Create constraints (will auto-create indexes)
+        self.session.run("CREATE CONSTRAINT patient_id_unique IF NOT EXISTS FOR (p:Patient) REQUIRE p.id IS UNIQUE")
+        self.session.run("CREATE CONSTRAINT diagnosis_code_unique IF NOT EXISTS FOR (d:Diagnosis) REQUIRE d.code IS UNIQUE")
+
+        # Create other indexes
+        self.session.run("CREATE INDEX IF NOT EXISTS FOR (d:Diagnosis) ON (d.name)")
+        self.session.run("CREATE INDEX IF NOT EXISTS FOR ()-[r:HAS_DIAGNOSIS]-() ON (r.age)")
+        self.session.run("CREATE INDEX IF NOT EXISTS FOR ()-[r:HAS_DIAGNOSIS]-() ON (r.visit_identifier)")
+
+    def consume(self, records):
+        """Write one chunk of patients with a single round trip per query"""
+        patients = []
+        diagnoses = []
+        for record in records:
+            patient_id = record['patient_id']
+            sex = record['sex']
+            patients.append({'id': patient_id, 'sex': sex if sex != 'NA' else None})
+
+            for age_code, age, codes in record['visits']:
+                for code in codes:
+                    diagnoses.append({
+                        'patient_id': patient_id,
+                        'code': code,
+                        'name': self.disease_names.get(code, 'UNKNOWN_CODE'),
+                        'age': age,
+                        'visit_id': f"{patient_id}_{age_code}"
+                    })
+
+        # Managed transaction: the transitions stage locks the same Diagnosis nodes concurrently,
+        # and a deadlock between the two is a transient error that execute_write retries
+        self.session.execute_write(self.write_chunk, patients, diagnoses)
+
+    @staticmethod
+    def write_chunk(tx, patients, diagnoses):
+        tx.run(
+            """
+            UNWIND $patients AS row
+            MERGE (p:Patient {id: row.id}) SET p.sex = row.sex
+            """,
+            patients=patients
+        )
+        tx.run(
+            """
+            UNWIND $diagnoses AS row
+            MERGE (d:Diagnosis {code: row.code}) ON CREATE SET d.name = row.name
+            WITH d, row
+            MATCH (p:Patient {id: row.patient_id})
+            MERGE (p)-[r:HAS_DIAGNOSIS {
+                age: row.age,
+                visit_identifier: row.visit_id
+            }]->(d)
+            """,
+            diagnoses=diagnoses
+        )
+
+    def finish(self):
+        self.session.close()
+        print("Patient graph written")
+
+    def abort(self):
+        self.session.close()
+
+class TransitionAggregator:
+    """Aggregate consecutive diagnosis pairs into PROGRESSES_TO edges (formerly construction-tra.py)"""
+    name = 'transitions'
+
+    def __init__(self, driver, disease_names, batch_size=1000):
+        self.driver = driver
+        self.disease_names = disease_names
+        self.batch_size = batch_size
+        self.trajectory_data = defaultdict(lambda: defaultdict(list))
+
+    def setup(self):
+        """Clear existing data before any stage writes to the database"""
+        with self.driver.session() as session:
+            session.run("MATCH (n) DETACH DELETE n")
+
+    def consume(self, records):
+        for record in records:
+            # Handle missing/unknown gender
+            sex = record['sex']
+            if sex not in ['1111', '2222']:
+                sex = 'UNKNOWN'
+
+            # Extract all diagnoses with ages
+            diagnoses = []
+            for age_code, age, codes in record['visits']:
+                diagnoses.extend((age, code) for code in codes if code in self.disease_names)
+
+            # Sort by age and record consecutive pairs with gender info
+            diagnoses.sort()
+            for i in range(len(diagnoses)-1):
+                from_age, from_code = diagnoses[i]
+                to_age, to_code = diagnoses[i+1]
+                time_interval = to_age - from_age + 1
+                # Store with gender stratification
+                self.trajectory_data[(from_code, to_code)][sex].append(time_interval)
+
+    def edge_properties(self, gender_data):
+        """Gender-stratified statistics and raw data for one transition"""
+        # Calculate overall statistics (across all genders)
+        all_intervals = []
+        for intervals in gender_data.values():
+            all_intervals.extend(intervals)
+
+        if not all_intervals:
+            return None
+
+        overall_stats = calculate_stats(all_intervals)
+        properties = {
+            'overall_frequency': overall_stats['count'],
+            'overall_min_years': overall_stats['min'],
+            'overall_max_years': overall_stats['max'],
+            'overall_avg_years': overall_stats['avg'],
+            'overall_median_years': overall_stats['median'],
+            'overall_std_dev': overall_stats['std_dev'],
+            'overall_q1': overall_stats['q1'],
+            'overall_q3': overall_stats['q3']
+        }
+
+        # Add gender-specific properties
+        for gender_code, intervals in gender_data.items():
+            if not intervals:
+                continue
+
+            gender_stats = calculate_stats(intervals)
+            gender_prefix = get_gender_prefix(gender_code)
+
+            properties.update({
+                f'{gender_prefix}_frequency': gender_stats['count'],
+                f'{gender_prefix}_min_years': gender_stats['min'],
+                f'{gender_prefix}_max_years': gender_stats['max'],
+                f'{gender_prefix}_avg_years': gender_stats['avg'],
+                f'{gender_prefix}_median_years': gender_stats['median'],
+                f'{gender_prefix}_std_dev': gender_stats['std_dev'],
+                f'{gender_prefix}_q1': gender_stats['q1'],
+                f'{gender_prefix}_q3': gender_stats['q3'],
+                f'{gender_prefix}_raw_data': json.dumps(intervals)
+            })
+        return properties
+
+    def finish(self):
+        """Write all diagnosis nodes and trajectory edges"""
+        print(f"Discovered {len(self.trajectory_data)} transitions")
+
+        with self.driver.session() as session:
+            # Create all diagnosis nodes
+            session.execute_write(
+                self.write_diagnoses,
+                [{'code': code, 'name': name} for code, name in sorted(self.disease_names.items())]
+            )
+
+            # Create trajectory edges with all properties, one managed transaction per batch;
+            # execute_write retries a batch that deadlocks with the patient stage
+            batch = []
+            for (from_code, to_code), gender_data in sorted(self.trajectory_data.items()):
+                properties = self.edge_properties(gender_data)
+                if properties is None:
+                    continue
+                batch.append({'from_code': from_code, 'to_code': to_code, 'properties': properties})
+                if len(batch) >= self.batch_size:
+                    session.execute_write(self.write_edges, batch)
+                    batch = []
+            if batch:
+                session.execute_write(self.write_edges, batch)
+
+        print(f"Created {len(self.trajectory_data)} trajectory relationships with gender stratification")
+
+    def abort(self):
+        self.trajectory_data.clear()
+
+    @staticmethod
+    def write_diagnoses(tx, diseases):
+        tx.run(
+            """
+            UNWIND $diseases AS row
+            MERGE (d:Diagnosis {code: row.code}) SET d.name = row.name
+            """,
+            diseases=diseases
+        )
+
+    @staticmethod
+    def write_edges(tx, batch):
+        tx.run(
+            """
+            UNWIND $edges AS row
+            MATCH (d1:Diagnosis {code: row.from_code})
+            MATCH (d2:Diagnosis {code: row.to_code})
+            MERGE (d1)-[r:PROGRESSES_TO]->(d2)
+            SET r += row.properties
+            """,
+            edges=batch
+        )
+
+class ColumnarExporter:
+    """Export one row per (patient, visit, diagnosis) to Parquet"""
+    name = 'columnar'
+
+    def __init__(self, output_file):
+        if pa is None:
+            raise ImportError("The columnar stage requires pyarrow (pip install pyarrow)")
+        self.output_file = output_file
+        self.schema = pa.schema([
+            ('patient_id', pa.string()),
+            ('sex', pa.string()),
+            ('age', pa.int32()),
+            ('code', pa.string())
+        ])
+        self.writer = None
+
+    def setup(self):
+        self.writer = pq.ParquetWriter(self.output_file, self.schema)
+
+    def consume(self, records):
+        columns = {'patient_id': [], 'sex': [], 'age': [], 'code': []}
+        for record in records:
+            for age_code, age, codes in record['visits']:
+                for code in codes:
+                    columns['patient_id'].append(record['patient_id'])
+                    columns['sex'].append(record['sex'])
+                    columns['age'].append(age)
+                    columns['code'].append(code)
+        self.writer.write_table(pa.table(columns, schema=self.schema))
+
+    def finish(self):
+        self.writer.close()
+        print(f"Exported diagnoses to {self.output_file}")
+
+    def abort(self):
+        """Remove the partial file so it can't be mistaken for a complete export"""
+        self.writer.close()
+        if os.path.exists(self.output_file):
+            os.remove(self.output_file)
+
+# Pipeline
+def run_stage(stage, inbox, errors, aborted):
+    """Consume chunks until the sentinel; keep draining after a failure so the parser never blocks"""
+    failed = False
+    while True:
+        records = inbox.get()
+        if records is SENTINEL:
+            break
+        if failed:
+            continue
+        try:
+            stage.consume(records)
+        except Exception as e:
+            print(f"Stage '{stage.name}' failed: {str(e)}")
+            errors.append((stage.name, e))
+            failed = True
+
+    if not failed and not aborted.is_set():
+        try:
+            stage.finish()
+            return
+        except Exception as e:
+            print(f"Stage '{stage.name}' failed: {str(e)}")
+            errors.append((stage.name, e))
+
+    # Release resources and discard partial output of failed or aborted stages
+    try:
+        stage.abort()
+    except Exception as e:
+        print(f"Stage '{stage.name}' could not clean up: {str(e)}")
+
+def run_pipeline(patient_csv, stages, queue_size=8, chunk_size=500):
+    """Read patient_csv once and fan every parsed chunk out to all stages"""
+    # Setup runs before any data flows, so the trajectory stage's clear cannot race patient writes
+    for stage in stages:
+        stage.setup()
+
+    errors = []
+    aborted = threading.Event()
+    inboxes = []
+    workers = []
+    for stage in stages:
+        inbox = queue.Queue(maxsize=queue_size)
+        worker = threading.Thread(target=run_stage, args=(stage, inbox, errors, aborted), name=stage.name)
+        worker.start()
+        inboxes.append(inbox)
+        workers.append(worker)
+
+    try:
+        for chunk in read_patients(patient_csv, chunk_size):
+            for inbox in inboxes:
+                inbox.put(chunk)
+    except BaseException:
+        # Don't let stages commit partial results if reading the input fails
+        aborted.set()
+        raise
+    finally:
+        for inbox in inboxes:
+            inbox.put(SENTINEL)
+        for worker in workers:
+            worker.join()
+
+    if errors:
+        stage_name, error = errors[0]
+        raise RuntimeError(f"Stage '{stage_name}' failed") from error
+
+STAGES = ['patients', 'transitions', 'columnar']
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build the CAMDA knowledge graphs from processed.csv in a single pass")
+    parser.add_argument('--stages', nargs='+', choices=STAGES, default=['patients', 'transitions'],
+                        help="Stages to run (default: patients transitions)")
+    parser.add_argument('--patients', default=PATIENT_CSV, help="Processed patient CSV")
+    parser.add_argument('--diseases', default=DISEASE_CSV, help="Disease code-name CSV")
+    parser.add_argument('--parquet', default=PARQUET_FILE, help="Output file of the columnar stage")
+    parser.add_argument('--queue-size', type=int, default=8, help="Chunks buffered per stage")
+    parser.add_argument('--chunk-size', type=int, default=500, help="Patients per chunk")
+    args = parser.parse_args(argv)
+
+    disease_names = load_disease_names(args.diseases)
+    driver = None
+    if 'patients' in args.stages or 'transitions' in args.stages:
+        driver = create_driver()
+
+    # Transitions first: its setup clears the database before the patient stage creates indexes
+    stages = []
+    if 'transitions' in args.stages:
+        stages.append(TransitionAggregator(driver, disease_names))
+    if 'patients' in args.stages:
+        stages.append(PatientGraphWriter(driver, disease_names))
+    if 'columnar' in args.stages:
+        stages.append(ColumnarExporter(args.parquet))
+
+    try:
+        run_pipeline(args.patients, stages, args.queue_size, args.chunk_size)
+    finally:
+        if driver is not None:
+            driver.close()
+    print(f"Ingestion finished: {', '.join(stage.name for stage in stages)}")
+
+if __name__ == "__main__":
+    main()
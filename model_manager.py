@@ -0,0 +1,187 @@
+import json
+import os
+import sys
+import threading
+import time
+import urllib.request
+from langchain_ollama import OllamaLLM
+from typing import List, Dict, Any
+
+# Keep models resident until the server is stopped (Ollama's default unloads after 5 minutes)
+DEFAULT_KEEP_ALIVE = "-1m"
+
+# Model selected in the UI before the user picks one
+DEFAULT_MODEL = "llama3.1:latest"
+
+# Model load states reported to the UI
+COLD = "cold"
+LOADING = "loading"
+READY = "ready"
+EVICTED = "evicted"
+FAILED = "failed"
+
+def normalize_model(model: str) -> str:
+    """Add the implicit ':latest' tag so names match what Ollama reports in /api/ps"""
+    if ":" not in model.rsplit("/", 1)[-1]:
+        return f"{model}:latest"
+    return model
+
+def preload_models(selected_model: str = DEFAULT_MODEL) -> List[str]:
+    """The selected model plus any extra models listed in OLLAMA_PRELOAD_MODELS"""
+    models = [normalize_model(selected_model)]
+    for model in os.getenv("OLLAMA_PRELOAD_MODELS", "").split(","):
+        model = model.strip()
+        if model and normalize_model(model) not in models:
+            models.append(normalize_model(model))
+    return models
+
+class ModelManager:
+    """Preload Ollama models, keep them resident and report their load state"""
+
+    def __init__(self, base_url: str, models: List[str], keep_alive: str = DEFAULT_KEEP_ALIVE,
+                 check_interval: int = 5):
+        self.base_url = base_url.rstrip("/")
+        self.models = list(dict.fromkeys(normalize_model(model) for model in models))
+        self.keep_alive = keep_alive
+        self.check_interval = check_interval
+        self.states = {model: COLD for model in self.models}
+        self.errors = {}
+        self.memory = {}
+        self.llms = {}
+        self.lock = threading.Lock()
+        self.loaded_events = {model: threading.Event() for model in self.models}
+        self.reachable = True
+        self.monitor = None
+
+    def _request(self, path: str, payload: Dict = None, timeout: int = 10) -> Dict[str, Any]:
+        """Call the Ollama REST API and return the decoded JSON response"""
+        data = json.dumps(payload).encode() if payload is not None else None
+        request = urllib.request.Request(
+            f"{self.base_url}{path}", data=data, headers={"Content-Type": "application/json"}
+        )
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            return json.loads(response.read() or b"{}")
+
+    def _load(self, model: str):
+        """Load a model into memory; a generate call without a prompt only loads it"""
+        try:
+            self._request(
+                "/api/generate",
+                {"model": model, "keep_alive": self.keep_alive, "stream": False},
+                timeout=600
+            )
+            with self.lock:
+                self.states[model] = READY
+                self.errors.pop(model, None)
+            print(f"✓ Model {model} loaded")
+        except Exception as e:
+            with self.lock:
+                self.states[model] = FAILED
+                self.errors[model] = str(e)
+            print(f"✗ Failed to load model {model}: {e}")
+        finally:
+            self.loaded_events[model].set()
+
+    def warm(self, model: str):
+        """Start loading a model in the background unless it is already loading or loaded.
+
+        Only called for models that were explicitly requested, so a model Ollama evicted
+        under memory pressure is not reloaded behind the user's back.
+        """
+        model = normalize_model(model)
+        with self.lock:
+            if model not in self.states:
+                self.models.append(model)
+                self.loaded_events[model] = threading.Event()
+            elif self.states[model] in (LOADING, READY):
+                return
+            self.states[model] = LOADING
+            self.loaded_events[model].clear()
+        threading.Thread(target=self._load, args=(model,), name=f"warm-{model}", daemon=True).start()
+
+    def start(self):
+        """Preload the managed models and track their state in the background"""
+        for model in self.models:
+            self.warm(model)
+        if self.monitor is None:
+            self.monitor = threading.Thread(target=self._monitor, name="model-monitor", daemon=True)
+            self.monitor.start()
+
+    def _monitor(self):
+        """Poll Ollama so the UI can read load state without blocking on HTTP"""
+        while True:
+            self.refresh()
+            time.sleep(self.check_interval)
+
+    def refresh(self):
+        """Update load state and memory usage from Ollama's list of running models"""
+        # Only models already loaded before the snapshot can be missing from it because of an
+        # eviction; a load finishing while the request is in flight is not in the snapshot yet
+        with self.lock:
+            ready_before = {model for model, state in self.states.items() if state == READY}
+        try:
+            running = self._request("/api/ps").get("models", [])
+        except Exception as e:
+            # Report only when Ollama becomes unreachable, not on every poll
+            if self.reachable:
+                print(f"✗ Failed to query running models: {e}")
+            self.reachable = False
+            return
+        self.reachable = True
+
+        memory = {
+            normalize_model(entry["name"]): {"size": entry.get("size", 0), "size_vram": entry.get("size_vram", 0)}
+            for entry in running
+        }
+        with self.lock:
+            self.memory = memory
+            for model in self.models:
+                if model in memory:
+                    self.states[model] = READY
+                    self.loaded_events[model].set()
+                elif model in ready_before and self.states[model] == READY:
+                    # Unloaded by Ollama (e.g. memory pressure); reloading it automatically
+                    # would evict another model in turn, so wait until it is requested again
+                    self.states[model] = EVICTED
+
+    def is_ready(self, model: str) -> bool:
+        return self.states.get(normalize_model(model)) == READY
+
+    def wait_until_ready(self, model: str, timeout: float = None) -> bool:
+        """Block until an in-flight load of the model finishes"""
+        model = normalize_model(model)
+        self.warm(model)
+        self.loaded_events[model].wait(timeout)
+        return self.is_ready(model)
+
+    def get_llm(self, model: str) -> OllamaLLM:
+        """Return a client that keeps the model resident between requests"""
+        if model not in self.llms:
+            self.llms[model] = OllamaLLM(base_url=self.base_url, model=model, keep_alive=self.keep_alive)
+        return self.llms[model]
+
+    def status(self) -> Dict[str, Dict[str, Any]]:
+        """Load state, memory usage and last error per model"""
+        with self.lock:
+            return {
+                model: {
+                    "state": self.states[model],
+                    "size": self.memory.get(model, {}).get("size", 0),
+                    "size_vram": self.memory.get(model, {}).get("size_vram", 0),
+                    "error": self.errors.get(model)
+                }
+                for model in self.models
+            }
+
+if __name__ == "__main__":
+    # Warm models before the first browser session connects, e.g. ahead of `streamlit run app.py`:
+    #   python model_manager.py llama3.1:latest
+    manager = ModelManager(
+        os.getenv("OLLAMA_BASE_URL", "http://localhost:11434"),
+        sys.argv[1:] or preload_models(),
+        keep_alive=os.getenv("OLLAMA_KEEP_ALIVE", DEFAULT_KEEP_ALIVE)
+    )
+    for model in manager.models:
+        manager.warm(model)
+    loaded = [manager.wait_until_ready(model) for model in manager.models]
+    sys.exit(0 if all(loaded) else 1)
@@ -4,12 +4,15 @@ from langchain.prompts import ChatPromptTemplate
 from langchain.schema import HumanMessage, SystemMessage
 from typing import List, Dict, Any
 import database
+import context
 
 class MedicalQueryProcessor:
     def __init__(self, graph, llm):
         self.graph = graph
         self.llm = llm
         self.diagnosis_cache = {}
+        self.total_transition_frequency = None
+        self.context_token_budget = context.DEFAULT_TOKEN_BUDGET
         
     def extract_diagnosis_info(self, user_query: str) -> tuple:
         """Extract diagnosis name and timeframe from user query"""
@@ -47,12 +50,17 @@ class MedicalQueryProcessor:
             
         return complications
     
-    def generate_response(self, query: str, complications_data: List[Dict], timeframe: int = None) -> str:
-        """Generate natural language response from retrieved data"""
-        formatted_data = ""
-        for comp in complications_data:
-            formatted_data += f"- {comp['complication_name']}: Typically occurs in {comp['avg_years']} years on average (frequency: {comp['frequency']})\n"
+    def build_context(self, complications_data: List[Dict], timeframe: int = None) -> Dict[str, Any]:
+        """Rank complications and pack them into the prompt token budget"""
+        if self.total_transition_frequency is None:
+            self.total_transition_frequency = database.get_total_transition_frequency(self.graph)
         
+        return context.build_context(
+            complications_data, timeframe, self.total_transition_frequency, self.context_token_budget
+        )
+    
+    def generate_response(self, query: str, medical_context: Dict[str, Any], timeframe: int = None) -> str:
+        """Generate natural language response from the packed complications table"""
         system_prompt = """You are a medical assistant that helps patients understand potential complications from their diagnoses. 
         Provide clear, compassionate, and factual information based on the data provided.
         Be specific about timeframes and probabilities when available.
@@ -63,8 +71,8 @@ class MedicalQueryProcessor:
             HumanMessage(content=f"""
             Patient Query: {query}
             
-            Medical Data:
-            {formatted_data}
+            Medical Data (ranked complications; avg_yrs/median_yrs = years to onset, n = patients observed, lift = risk relative to the general population):
+            {medical_context['table']}
             
             Please provide a helpful response about potential complications within {timeframe} years if specified.
             """)
@@ -103,12 +111,15 @@ class MedicalQueryProcessor:
                     "error": f"No complication data found for {diagnosis_name} in our database."
                 }
         
-        response = self.generate_response(user_query, complications, timeframe)
+        medical_context = self.build_context(complications, timeframe)
+        response = self.generate_response(user_query, medical_context, timeframe)
         
         return {
             "success": True,
             "diagnosis": diagnosis_name,
             "timeframe": timeframe,
             "complications": complications,
+            "context_rows": medical_context["included"],
+            "dropped_rows": medical_context["dropped"],
             "response": response
         }
\ No newline at end of file